@@ -1,11 +1,208 @@
-from flask import Flask, jsonify, render_template, send_from_directory
+from flask import Flask, jsonify, render_template, send_from_directory, request, Response
 import pandas as pd
+import numpy as np
 import os
+import sys
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps, lru_cache
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import BRENT_PROCESSED_PATH, EVENTS_PROCESSED_PATH, MIN_EVENT_IMPACT
+from src.data_processing import DataProcessor
+from src.changepoint import detect_change_points
+from src.bayesian_changepoint import bayesian_change_point
+from src.event_impact import PriceIndex, calculate_event_impact
+from src.downsample import lttb_indices, minmax_indices
+
 app = Flask(__name__, static_folder='dashboard/frontend/build/static', template_folder='dashboard/frontend/build')
 
-# ... (keep all your existing routes)
+DEFAULT_POINTS = 1000
+MAX_POINTS = 10000
+RESPONSE_CACHE_SIZE = 256
+CACHE_MAX_AGE = 300
+POSTERIOR_MIN_PROB = 1e-6
+
+
+class ResultsCache:
+    """Processed data loaded once per process, plus the indexes the API needs"""
+
+    def __init__(self):
+        # run_pipeline serves the store when it matches the raw inputs and rebuilds it otherwise
+        try:
+            brent, events = DataProcessor().run_pipeline()
+        except FileNotFoundError:
+            # Deployments without the raw files serve the shipped processed CSVs
+            brent = pd.read_csv(BRENT_PROCESSED_PATH, parse_dates=['Date'])
+            events = pd.read_csv(EVENTS_PROCESSED_PATH, parse_dates=['Event_date'])
+
+        self.brent = brent.sort_values('Date').reset_index(drop=True)
+        self.events = events
+        self.dates = self.brent['Date'].to_numpy(dtype='datetime64[ns]')
+        self.prices = self.brent['Price'].to_numpy(dtype=np.float64)
+        self.date_strings = np.datetime_as_string(self.dates, unit='D')
+        self.price_index = PriceIndex.from_frame(self.brent)
+
+
+results = ResultsCache()
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def cached_json(view):
+    """
+    Serve the view's JSON payload gzip-compressed with an ETag.
+
+    Encoded bodies are kept per URL (query string included), so repeated
+    requests skip recomputation and conditional requests get a 304. The
+    cache is shared by the server's threads, so it is only touched under
+    _responses_lock.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.full_path
+        with _responses_lock:
+            entry = _responses.get(key)
+            if entry is not None:
+                _responses.move_to_end(key)
+
+        if entry is None:
+            # Computed outside the lock; concurrent misses on one URL may both compute it
+            try:
+                payload = view(*args, **kwargs)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+            entry = {
+                'identity': body,
+                'gzip': gzip.compress(body, compresslevel=6),
+                'etag': hashlib.sha1(body).hexdigest(),
+            }
+            with _responses_lock:
+                _responses[key] = entry
+                if len(_responses) > RESPONSE_CACHE_SIZE:
+                    _responses.popitem(last=False)
+
+        use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        encoding = 'gzip' if use_gzip else 'identity'
+        response = Response(entry[encoding], mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = f'public, max-age={CACHE_MAX_AGE}'
+        response.set_etag(f"{entry['etag']}-{encoding}")
+        return response.make_conditional(request)
+    return wrapper
+
+
+def _parse_date(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return np.datetime64(pd.Timestamp(value), 'ns')
+    except Exception:
+        raise ValueError(f"Invalid date for '{name}': {value}")
+
+
+@lru_cache(maxsize=64)
+def _change_points(method, model, n_changepoints, penalty):
+    if method == 'bayesian':
+        result = bayesian_change_point(results.brent)
+        pre, post = result['pre_change_stats'], result['post_change_stats']
+        # Only ship the part of the posterior over tau with non-negligible mass
+        posterior = result['posterior_tau']
+        keep = [i for i, p in enumerate(posterior['probability']) if p >= POSTERIOR_MIN_PROB]
+        # Same flat keys as the binseg/pelt records, plus the credible interval and posterior
+        return [{
+            'change_point_index': result['change_point_index'],
+            'change_point_date': result['change_point_date'][:10],
+            'log_return_mean_before': pre['log_return_mean'],
+            'log_return_mean_after': post['log_return_mean'],
+            'log_return_std_before': pre['log_return_volatility'],
+            'log_return_std_after': post['log_return_volatility'],
+            'price_at_change': result['price_at_change'],
+            'price_mean_before': pre['mean'],
+            'price_mean_after': post['mean'],
+            'credible_interval': result['credible_interval'],
+            'posterior_tau': {
+                'date': [posterior['date'][i] for i in keep],
+                'probability': [posterior['probability'][i] for i in keep],
+            },
+        }]
+    df = detect_change_points(results.brent, model=model, method=method,
+                              n_changepoints=n_changepoints, penalty=penalty)
+    df['change_point_date'] = df['change_point_date'].dt.strftime('%Y-%m-%d')
+    return df.to_dict('records')
+
+
+@app.route('/api/prices')
+@cached_json
+def api_prices():
+    """Price series for a date range, downsampled to at most `points` points"""
+    start, end = _parse_date('start'), _parse_date('end')
+    points = min(max(request.args.get('points', DEFAULT_POINTS, type=int), 3), MAX_POINTS)
+    method = request.args.get('method', 'lttb')
+    if method not in ('lttb', 'minmax'):
+        raise ValueError("method must be 'lttb' or 'minmax'")
+
+    if start is not None and end is not None and end < start:
+        raise ValueError("'end' must not be before 'start'")
+
+    lo = 0 if start is None else int(np.searchsorted(results.dates, start, side='left'))
+    hi = len(results.dates) if end is None else int(np.searchsorted(results.dates, end, side='right'))
+    dates, prices = results.dates[lo:hi], results.prices[lo:hi]
+
+    if method == 'lttb':
+        idx = lttb_indices(dates.view(np.int64), prices, points)
+    else:
+        idx = minmax_indices(prices, points)
+
+    return {
+        'n_total': hi - lo,
+        'n_returned': len(idx),
+        'method': method,
+        'dates': results.date_strings[lo:hi][idx].tolist(),
+        'prices': np.round(prices[idx], 4).tolist(),
+    }
+
+
+@app.route('/api/change-points')
+@cached_json
+def api_change_points():
+    """
+    Detected change points as a list of records; method is 'binseg', 'pelt'
+    or 'bayesian' (one record, with its credible interval and posterior)
+    """
+    method = request.args.get('method', 'binseg')
+    model = request.args.get('model', 'meanvar')
+    n_changepoints = request.args.get('n', type=int)
+    penalty = request.args.get('penalty', type=float)
+    if method not in ('binseg', 'pelt', 'bayesian'):
+        raise ValueError("method must be 'binseg', 'pelt' or 'bayesian'")
+    return {'method': method, 'change_points': _change_points(method, model, n_changepoints, penalty)}
+
+
+@app.route('/api/event-impacts')
+@cached_json
+def api_event_impacts():
+    """Event impacts for one or more window sizes (?window=5&window=30)"""
+    windows = request.args.getlist('window', type=int) or [5]
+    min_impact = request.args.get('min_impact', MIN_EVENT_IMPACT)
+    if min_impact.lower() == 'all':
+        min_impact = None
+
+    impacts = calculate_event_impact(results.brent, results.events, window_days=windows,
+                                     min_impact=min_impact, index=results.price_index)
+    impacts['date'] = impacts['date'].dt.strftime('%Y-%m-%d')
+    impacts = impacts.replace({np.nan: None})
+    return {'windows': windows, 'min_impact': min_impact, 'impacts': impacts.to_dict('records')}
+
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -16,4 +213,4 @@ def serve(path):
         return send_from_directory(app.template_folder, 'index.html')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
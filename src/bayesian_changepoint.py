@@ -0,0 +1,245 @@
+# src/bayesian_changepoint.py
+import logging
+from typing import Optional, Dict, Any
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+from src.config import MODEL_CONFIG
+from src.utils import log_execution
+
+logger = logging.getLogger(__name__)
+
+
+def _nig_log_marginal(n, s1, s2, mu0, kappa0, alpha0, beta0):
+    """
+    Log marginal likelihood of Normal data with a Normal-Inverse-Gamma prior,
+    from segment count, sum and sum of squares (vectorized over segments)
+    """
+    xbar = s1 / n
+    ss = np.maximum(s2 - s1 * xbar, 0.0)
+    kappa_n = kappa0 + n
+    alpha_n = alpha0 + n / 2.0
+    beta_n = beta0 + 0.5 * ss + kappa0 * n * (xbar - mu0) ** 2 / (2.0 * kappa_n)
+
+    return (gammaln(alpha_n) - gammaln(alpha0)
+            + alpha0 * np.log(beta0) - alpha_n * np.log(beta_n)
+            + 0.5 * (np.log(kappa0) - np.log(kappa_n))
+            - 0.5 * n * np.log(2.0 * np.pi))
+
+
+def _nig_posterior_moments(n, s1, s2, mu0, kappa0, alpha0, beta0):
+    """Posterior mean of mu and sigma for one segment"""
+    xbar = s1 / n
+    ss = max(s2 - s1 * xbar, 0.0)
+    kappa_n = kappa0 + n
+    alpha_n = alpha0 + n / 2.0
+    beta_n = beta0 + 0.5 * ss + kappa0 * n * (xbar - mu0) ** 2 / (2.0 * kappa_n)
+
+    mean = (kappa0 * mu0 + s1) / kappa_n
+    variance = beta_n / (alpha_n - 1.0) if alpha_n > 1.0 else beta_n / alpha_n
+    return mean, np.sqrt(variance)
+
+
+def _validate_signal(signal, min_size: int) -> np.ndarray:
+    """1-D finite float array with room for min_size points on each side of a switch"""
+    x = np.asarray(signal, dtype=np.float64)
+    if x.ndim != 1:
+        raise ValueError("Signal must be one-dimensional")
+    if not np.isfinite(x).all():
+        raise ValueError("Signal contains NaN or infinite values")
+    if min_size < 1:
+        raise ValueError("min_size must be positive")
+    if len(x) < 2 * min_size:
+        raise ValueError(f"Need at least {2 * min_size} observations, got {len(x)}")
+    return x
+
+
+@log_execution
+def switchpoint_posterior(signal, min_size: int = 2, mu0: Optional[float] = None,
+                          kappa0: float = 0.01, alpha0: float = 1.0,
+                          beta0: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Exact posterior over a single switch point tau for a Normal model with
+    unknown mean and variance on each side and a conjugate NIG prior.
+
+    tau is the index of the first observation after the switch; every
+    candidate tau in [min_size, n - min_size] is scored in one pass from
+    prefix sums of x and x^2 under a uniform prior.
+    """
+    x = _validate_signal(signal, min_size)
+    n = len(x)
+
+    # Centre the data so prefix sums of x^2 don't lose precision
+    shift = x.mean()
+    xc = x - shift
+    mu0 = 0.0 if mu0 is None else mu0 - shift
+    if beta0 is None:
+        beta0 = max(float(xc.var()), np.finfo(np.float64).tiny) * alpha0
+
+    cs1 = np.concatenate(([0.0], np.cumsum(xc)))
+    cs2 = np.concatenate(([0.0], np.cumsum(xc * xc)))
+
+    taus = np.arange(min_size, n - min_size + 1)
+    n_before = taus.astype(np.float64)
+    n_after = n - n_before
+
+    log_post = (
+        _nig_log_marginal(n_before, cs1[taus], cs2[taus], mu0, kappa0, alpha0, beta0)
+        + _nig_log_marginal(n_after, cs1[n] - cs1[taus], cs2[n] - cs2[taus],
+                            mu0, kappa0, alpha0, beta0)
+    )
+    log_post -= log_post.max()
+    posterior = np.exp(log_post)
+    posterior /= posterior.sum()
+
+    tau_map = int(taus[np.argmax(posterior)])
+    mean_before, vol_before = _nig_posterior_moments(
+        tau_map, cs1[tau_map], cs2[tau_map], mu0, kappa0, alpha0, beta0)
+    mean_after, vol_after = _nig_posterior_moments(
+        n - tau_map, cs1[n] - cs1[tau_map], cs2[n] - cs2[tau_map], mu0, kappa0, alpha0, beta0)
+
+    return {
+        "tau": taus,
+        "posterior": posterior,
+        "tau_map": tau_map,
+        "before": {"mean": mean_before + shift, "volatility": vol_before},
+        "after": {"mean": mean_after + shift, "volatility": vol_after},
+    }
+
+
+def switchpoint_posterior_mcmc(signal, min_size: int = 1, n_samples: Optional[int] = None,
+                               tune: Optional[int] = None, target_accept: Optional[float] = None,
+                               random_seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sampled posterior for the same switch-point model using PyMC, with tau
+    uniform on [min_size, n - min_size].
+
+    Slow and only needed for non-conjugate variants; sampler settings
+    default to MODEL_CONFIG.
+    """
+    x = _validate_signal(signal, min_size)
+
+    try:
+        import pymc as pm
+    except ImportError:
+        try:
+            import pymc3 as pm
+        except ImportError as e:
+            raise ImportError("MCMC fallback requires pymc (or pymc3) to be installed") from e
+
+    n = len(x)
+    idx = np.arange(n)
+    scale = float(x.std()) or 1.0
+
+    with pm.Model():
+        tau = pm.DiscreteUniform("tau", lower=min_size, upper=n - min_size)
+        mu_1 = pm.Normal("mu_1", mu=float(x.mean()), sigma=scale * 10)
+        mu_2 = pm.Normal("mu_2", mu=float(x.mean()), sigma=scale * 10)
+        sigma_1 = pm.HalfNormal("sigma_1", sigma=scale * 10)
+        sigma_2 = pm.HalfNormal("sigma_2", sigma=scale * 10)
+        mu = pm.math.switch(tau > idx, mu_1, mu_2)
+        sigma = pm.math.switch(tau > idx, sigma_1, sigma_2)
+        pm.Normal("obs", mu=mu, sigma=sigma, observed=x)
+
+        trace = pm.sample(
+            draws=n_samples or MODEL_CONFIG["n_samples"],
+            tune=tune or MODEL_CONFIG["tune"],
+            target_accept=target_accept or MODEL_CONFIG["target_accept"],
+            random_seed=random_seed if random_seed is not None else MODEL_CONFIG["random_seed"],
+            return_inferencedata=False,
+            progressbar=False,
+        )
+
+    tau_draws = np.asarray(trace["tau"], dtype=np.int64)
+    taus = np.arange(min_size, n - min_size + 1)
+    posterior = np.bincount(tau_draws, minlength=n + 1)[taus].astype(np.float64)
+    posterior /= posterior.sum()
+
+    return {
+        "tau": taus,
+        "posterior": posterior,
+        "tau_map": int(taus[np.argmax(posterior)]),
+        "before": {"mean": float(np.mean(trace["mu_1"])), "volatility": float(np.mean(trace["sigma_1"]))},
+        "after": {"mean": float(np.mean(trace["mu_2"])), "volatility": float(np.mean(trace["sigma_2"]))},
+    }
+
+
+def credible_interval(taus: np.ndarray, posterior: np.ndarray, mass: float = 0.95):
+    """Equal-tailed credible interval for tau"""
+    cdf = np.cumsum(posterior)
+    tail = (1.0 - mass) / 2.0
+    lower = int(taus[min(np.searchsorted(cdf, tail), len(taus) - 1)])
+    upper = int(taus[min(np.searchsorted(cdf, 1.0 - tail), len(taus) - 1)])
+    return lower, upper
+
+
+@log_execution
+def bayesian_change_point(df: pd.DataFrame, column: str = "log_return", method: str = "conjugate",
+                          credible_mass: float = 0.95, min_size: int = 2,
+                          date_col: str = "Date", **prior) -> Dict[str, Any]:
+    """
+    Single switch-point analysis of df[column] in the change_point_results.json layout.
+
+    method="conjugate" computes the exact NIG posterior; method="mcmc" samples
+    it with PyMC using the MODEL_CONFIG sampler settings. The NIG prior
+    keywords (mu0, kappa0, alpha0, beta0) only apply to the conjugate model.
+    """
+    try:
+        df = df.sort_values(date_col).reset_index(drop=True)
+        values = df[column].to_numpy(dtype=np.float64)
+
+        if method == "conjugate":
+            fit = switchpoint_posterior(values, min_size=min_size, **prior)
+        elif method == "mcmc":
+            if prior:
+                raise ValueError(f"Prior arguments {sorted(prior)} only apply to method='conjugate'")
+            fit = switchpoint_posterior_mcmc(values, min_size=min_size)
+        else:
+            raise ValueError(f"Unknown method '{method}', expected 'conjugate' or 'mcmc'")
+
+        dates = df[date_col].to_numpy()
+        tau_map = fit["tau_map"]
+        lower, upper = credible_interval(fit["tau"], fit["posterior"], credible_mass)
+
+        results = {
+            "change_point_index": tau_map,
+            "change_point_date": str(pd.Timestamp(dates[tau_map])),
+            "credible_interval": {
+                "mass": credible_mass,
+                "lower_index": lower,
+                "upper_index": upper,
+                "lower_date": str(pd.Timestamp(dates[lower])),
+                "upper_date": str(pd.Timestamp(dates[upper])),
+            },
+            "posterior_tau": {
+                "date": [str(pd.Timestamp(d)) for d in dates[fit["tau"]]],
+                "probability": fit["posterior"].tolist(),
+            },
+            "pre_change_stats": {
+                f"{column}_mean": float(fit["before"]["mean"]),
+                f"{column}_volatility": float(fit["before"]["volatility"]),
+            },
+            "post_change_stats": {
+                f"{column}_mean": float(fit["after"]["mean"]),
+                f"{column}_volatility": float(fit["after"]["volatility"]),
+            },
+            "method": method,
+        }
+
+        if "Price" in df.columns:
+            prices = df["Price"].to_numpy(dtype=np.float64)
+            results["price_at_change"] = float(prices[tau_map])
+            results["pre_change_stats"].update(
+                mean=float(prices[:tau_map].mean()), std=float(prices[:tau_map].std()))
+            results["post_change_stats"].update(
+                mean=float(prices[tau_map:].mean()), std=float(prices[tau_map:].std()))
+
+        logger.info(f"Most probable change point: {results['change_point_date']} "
+                    f"({lower}-{upper} at {credible_mass:.0%})")
+        return results
+
+    except Exception as e:
+        logger.error(f"Bayesian change point analysis failed: {str(e)}")
+        raise
@@ -0,0 +1,226 @@
+# src/benchmark.py
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Sequence, Tuple, Optional, Dict, Callable, Any
+
+import numpy as np
+import pandas as pd
+
+from src.config import BENCHMARK_DIR, DEFAULT_START_DATE, MODEL_CONFIG
+from src.data_processing import DataProcessor
+from src.changepoint import detect_change_points
+from src.bayesian_changepoint import switchpoint_posterior
+from src.event_impact import calculate_event_impact
+from src.online_changepoint import OnlineChangePointDetector
+from src.utils import profiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+
+# Stages above these sizes are reported as skipped rows rather than run:
+# daily calendars past ~50k rows run beyond pandas' datetime64[ns] range (year 2262),
+# exact PELT (jump=1) is quadratic when breaks are sparse (~15 s at 1e5), and the
+# online detector is a per-observation Python loop
+PIPELINE_MAX_ROWS = 5 * 10 ** 4
+PELT_EXACT_MAX_ROWS = 10 ** 5
+ONLINE_MAX_ROWS = 10 ** 4
+
+RECORD_FIELDS = ("stage", "wall_s", "cpu_s", "peak_mem_mb", "rows_in", "rows_out")
+
+
+def synthetic_returns(n: int, n_breaks: int = 5, min_segment: Optional[int] = None,
+                      seed: int = MODEL_CONFIG["random_seed"]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Piecewise-stationary log returns with n_breaks known breakpoints.
+    Each regime changes volatility by 1.5-3x and draws a new drift.
+    """
+    rng = np.random.default_rng(seed)
+    min_segment = min_segment or max(n // (4 * (n_breaks + 1)), 10)
+    spare = n - min_segment * (n_breaks + 1)
+    if spare < 0:
+        raise ValueError(f"n={n} too short for {n_breaks} breaks of at least {min_segment} points")
+
+    lengths = min_segment + np.floor(rng.dirichlet(np.ones(n_breaks + 1)) * spare).astype(np.int64)
+    lengths[-1] += n - lengths.sum()
+    breaks = np.cumsum(lengths)[:-1]
+
+    returns = np.empty(n)
+    sigma = 0.015
+    start = 0
+    for length in lengths:
+        returns[start:start + length] = rng.normal(rng.normal(0, 5e-4), sigma, length)
+        sigma *= rng.uniform(1.5, 3.0) ** rng.choice([-1, 1])
+        sigma = float(np.clip(sigma, 0.003, 0.1))
+        start += length
+    return returns, breaks
+
+
+def synthetic_prices(n: int, n_breaks: int = 5, seed: int = MODEL_CONFIG["random_seed"]) -> pd.DataFrame:
+    """Raw-format Date/Price frame with weekend-style gaps, as read from BrentOilPrices.csv"""
+    rng = np.random.default_rng(seed)
+    returns, _ = synthetic_returns(n, n_breaks, seed=seed)
+    prices = 20.0 * np.exp(np.cumsum(returns))
+    gaps = 1 + (rng.random(n) < 0.3).astype(np.int64)
+    dates = np.datetime64(DEFAULT_START_DATE, "D") + np.cumsum(gaps)
+    return pd.DataFrame({"Date": pd.to_datetime(dates), "Price": prices})
+
+
+def detection_accuracy(true_breaks: Sequence[int], found: Sequence[int], margin: int) -> Dict[str, float]:
+    """Precision/recall of found breakpoints within margin, and mean error of the matched ones"""
+    true_breaks = np.asarray(true_breaks, dtype=np.int64)
+    found = np.asarray(found, dtype=np.int64)
+    if len(found) == 0 or len(true_breaks) == 0:
+        return {"precision": float("nan"), "recall": 0.0, "mean_abs_error": float("nan")}
+
+    distance = np.abs(true_breaks[:, None] - found[None, :])
+    recalled = distance.min(axis=1) <= margin
+    precise = distance.min(axis=0) <= margin
+    return {
+        "precision": float(precise.mean()),
+        "recall": float(recalled.mean()),
+        "mean_abs_error": float(distance.min(axis=1)[recalled].mean()) if recalled.any() else float("nan"),
+    }
+
+
+def _timed(stage: str, fn: Callable, trace_memory: bool) -> Tuple[Any, dict]:
+    """
+    Run fn untraced for timing and, if trace_memory, once more under
+    tracemalloc for the peak (tracing slows allocation-heavy loops).
+    """
+    with profiler.profile(trace_memory=False):
+        result = fn()
+    record = dict(next(r for r in reversed(profiler.records) if r["stage"].endswith(stage)))
+    if trace_memory:
+        with profiler.profile(trace_memory=True):
+            fn()
+        traced = next(r for r in reversed(profiler.records) if r["stage"].endswith(stage))
+        record["peak_mem_mb"] = traced["peak_mem_mb"]
+    return result, record
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, n_breaks: int = 5,
+                   trace_memory: bool = True, seed: int = MODEL_CONFIG["random_seed"]) -> pd.DataFrame:
+    """
+    Run every pipeline stage and detector on synthetic series of each size and
+    return one row per (size, stage) with time, throughput, memory and accuracy.
+    """
+    rows = []
+    logging.getLogger("src").setLevel(logging.WARNING)
+
+    for n in sizes:
+        returns, true_breaks = synthetic_returns(n, n_breaks, seed=seed)
+        single, single_break = synthetic_returns(n, 1, seed=seed)
+        margin = max(n // 1000, 5)
+        frame = pd.DataFrame({"Date": np.arange(n), "log_return": returns})
+
+        def run(stage, fn, method=None, score=None):
+            result, record = _timed(stage, fn, trace_memory)
+            row = {"n": n, **{key: record[key] for key in RECORD_FIELDS}, "status": "ok",
+                   "throughput_rows_s": n / record["wall_s"] if record["wall_s"] > 0 else float("nan")}
+            if method is not None:
+                row["method"] = method
+            if score is not None:
+                row.update(score(result))
+            rows.append(row)
+            return result
+
+        def skip(stage, max_rows, method=None):
+            row = {"n": n, "stage": stage, "status": f"skipped (n > {max_rows})"}
+            if method is not None:
+                row["method"] = method
+            rows.append(row)
+
+        if n <= PIPELINE_MAX_ROWS:
+            raw = synthetic_prices(n, n_breaks, seed=seed)
+            processed = run("process_brent_data", lambda: DataProcessor().process_brent_data(raw.copy()))
+            events = pd.DataFrame({
+                "Event_name": [f"event_{i}" for i in range(1000)],
+                "Event_date": processed["Date"].sample(1000, replace=True, random_state=seed).to_numpy(),
+            })
+            run("calculate_event_impact",
+                lambda: calculate_event_impact(processed, events, window_days=(5, 10, 30), min_impact=None))
+        else:
+            skip("DataProcessor.process_brent_data", PIPELINE_MAX_ROWS)
+            skip("calculate_event_impact", PIPELINE_MAX_ROWS)
+
+        score_breaks = lambda found: detection_accuracy(true_breaks, found["change_point_index"], margin)
+        run("detect_change_points",
+            lambda: detect_change_points(frame, method="binseg", n_changepoints=n_breaks, min_size=margin),
+            method="binseg", score=score_breaks)
+        if n <= PELT_EXACT_MAX_ROWS:
+            run("detect_change_points",
+                lambda: detect_change_points(frame, method="pelt", min_size=margin, jump=1),
+                method="pelt", score=score_breaks)
+        else:
+            skip("detect_change_points", PELT_EXACT_MAX_ROWS, method="pelt")
+        run("detect_change_points",
+            lambda: detect_change_points(frame, method="pelt", min_size=margin, jump="auto"),
+            method="pelt-coarse", score=score_breaks)
+
+        run("switchpoint_posterior", lambda: switchpoint_posterior(single, min_size=margin),
+            method="conjugate", score=lambda fit: detection_accuracy(single_break, [fit["tau_map"]], margin))
+
+        if n <= ONLINE_MAX_ROWS:
+            run("warm_start", lambda: OnlineChangePointDetector().warm_start(frame))
+        else:
+            skip("OnlineChangePointDetector.warm_start", ONLINE_MAX_ROWS)
+
+    return pd.DataFrame(rows)
+
+
+def check_regressions(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float = 0.2) -> pd.DataFrame:
+    """
+    Rows whose throughput dropped more than tolerance, or recall dropped, against
+    a baseline run; also rows that ran in the baseline but were skipped now
+    """
+    keys = ["n", "stage", "method"]
+    results = results.assign(method=results.get("method", pd.Series(dtype=object)).fillna(""))
+    baseline = baseline.assign(method=baseline.get("method", pd.Series(dtype=object)).fillna(""))
+    merged = results.merge(baseline, on=keys, suffixes=("", "_baseline"))
+
+    slower = merged["throughput_rows_s"] < (1 - tolerance) * merged["throughput_rows_s_baseline"]
+    if "status" in merged.columns and "status_baseline" in merged.columns:
+        slower |= (merged["status"] != "ok") & (merged["status_baseline"] == "ok")
+    less_accurate = pd.Series(False, index=merged.index)
+    if "recall" in merged.columns and "recall_baseline" in merged.columns:
+        less_accurate = merged["recall"] < merged["recall_baseline"]
+    return merged[slower | less_accurate]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic-scale benchmarks for the change point pipeline")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES,
+                        help="Series lengths, e.g. 1e4 1e5 1e6 1e7")
+    parser.add_argument("--breaks", type=int, default=5, help="Known breakpoints per series")
+    parser.add_argument("--output-dir", type=Path, default=BENCHMARK_DIR)
+    parser.add_argument("--baseline", type=Path, help="Previous results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop vs baseline")
+    parser.add_argument("--no-trace-memory", action="store_true", help="Skip tracemalloc (faster)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks([int(n) for n in args.sizes], n_breaks=args.breaks,
+                             trace_memory=not args.no_trace_memory)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.output_dir / "benchmark_results.csv", index=False)
+    results.to_json(args.output_dir / "benchmark_results.json", orient="records", indent=2)
+    profiler.export_json(args.output_dir / "stage_profile.json")
+    print(results.to_string(index=False))
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = pd.DataFrame(json.load(f))
+        regressions = check_regressions(results, baseline, args.tolerance)
+        if not regressions.empty:
+            print("\nRegressions against baseline:")
+            print(regressions.to_string(index=False))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+# src/changepoint.py
+import heapq
+import logging
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import MODEL_CONFIG
+from src.utils import log_execution
+
+logger = logging.getLogger(__name__)
+
+COST_MODELS = ("mean", "var", "meanvar")
+SEARCH_METHODS = ("pelt", "binseg")
+
+# Free parameters per segment for each cost model (used for the BIC-style default penalty)
+_MODEL_PARAMS = {"mean": 1, "var": 1, "meanvar": 2}
+
+# Candidate grid size for PELT's coarse search (jump="auto", see auto_jump)
+PELT_MAX_GRID = 10_000
+# Series length above which detect_change_points falls back to the coarse search
+# by default; exact PELT is quadratic when breaks are sparse (~15 s at 1e5 rows)
+PELT_AUTO_JUMP_ROWS = 500_000
+
+
+class SegmentCost:
+    """
+    Gaussian segment costs evaluated in O(1) from cumulative sums.
+
+    - mean:    shift in mean, common variance  -> SSE / global variance
+    - var:     shift in variance, common mean  -> n * log(sum((x - mu)^2) / n)
+    - meanvar: shift in mean and variance      -> n * log(segment variance)
+    """
+
+    def __init__(self, signal: np.ndarray, model: str = "meanvar"):
+        if model not in COST_MODELS:
+            raise ValueError(f"Unknown cost model '{model}', expected one of {COST_MODELS}")
+
+        x = np.asarray(signal, dtype=np.float64)
+        if x.ndim != 1:
+            raise ValueError("Signal must be one-dimensional")
+        if not np.isfinite(x).all():
+            raise ValueError("Signal contains NaN or infinite values")
+
+        self.model = model
+        self.n = len(x)
+        if model == "var":
+            x = x - x.mean()
+
+        self.scale = max(float(np.var(x)), np.finfo(np.float64).tiny)
+        # Floor for segment variances so flat (interpolated) stretches don't give log(0)
+        self.min_var = self.scale * 1e-8
+
+        self.cs1 = np.concatenate(([0.0], np.cumsum(x)))
+        self.cs2 = np.concatenate(([0.0], np.cumsum(x * x)))
+
+    def cost(self, start, end):
+        """Cost of segment(s) x[start:end]; start/end may be scalars or arrays"""
+        n = end - start
+        s1 = self.cs1[end] - self.cs1[start]
+        s2 = self.cs2[end] - self.cs2[start]
+
+        if self.model == "mean":
+            return (s2 - s1 * s1 / n) / self.scale
+        if self.model == "var":
+            return n * np.log(np.maximum(s2 / n, self.min_var))
+        var = s2 / n - (s1 / n) ** 2
+        return n * np.log(np.maximum(var, self.min_var))
+
+    def default_penalty(self) -> float:
+        """BIC-style penalty: (segment parameters + location) * log(n)"""
+        return (_MODEL_PARAMS[self.model] + 1) * np.log(self.n)
+
+
+def _pelt(cost: SegmentCost, penalty: float, min_size: int, jump: int) -> List[int]:
+    """
+    Pruned Exact Linear Time search (Killick et al., 2012).
+
+    Pruning only keeps the candidate set small when change points are dense;
+    with few, widely spaced breaks it grows roughly linearly with t, so the
+    search is quadratic in n / jump (about 15 s for 1e5 points at jump=1).
+    """
+    n = cost.n
+    ends = np.unique(np.r_[np.arange(jump, n, jump), n])
+    ends = ends[ends >= min_size]
+
+    F = np.full(n + 1, np.inf)
+    F[0] = -penalty
+    last = np.zeros(n + 1, dtype=np.int64)
+
+    # Origins become admissible candidates once they are min_size behind t
+    pending = np.r_[0, ends[ends < n]]
+    next_pending = 0
+    candidates = np.empty(0, dtype=np.int64)
+
+    for t in ends:
+        admit_to = np.searchsorted(pending, t - min_size, side="right")
+        if admit_to > next_pending:
+            new = pending[next_pending:admit_to]
+            candidates = np.concatenate((candidates, new[np.isfinite(F[new])]))
+            next_pending = admit_to
+        if candidates.size == 0:
+            continue
+
+        values = F[candidates] + cost.cost(candidates, t)
+        best = np.argmin(values)
+        F[t] = values[best] + penalty
+        last[t] = candidates[best]
+        candidates = candidates[values <= F[t]]
+
+    breakpoints = []
+    t = n
+    while t > 0:
+        breakpoints.append(int(t))
+        t = int(last[t])
+    return sorted(breakpoints)
+
+
+def auto_jump(n: int) -> int:
+    """Smallest jump that keeps PELT's candidate grid within PELT_MAX_GRID points"""
+    return max(1, -(-n // PELT_MAX_GRID))
+
+
+def _refine(cost: SegmentCost, breakpoints: List[int], min_size: int, jump: int) -> List[int]:
+    """
+    Move each breakpoint found on a coarse (jump > 1) grid to the best exact
+    split within +/- jump, holding its neighbours fixed.
+    """
+    bkps = list(breakpoints)
+    for i in range(len(bkps) - 1):
+        lo = bkps[i - 1] if i > 0 else 0
+        hi = bkps[i + 1]
+        splits = np.arange(max(lo + min_size, bkps[i] - jump), min(hi - min_size, bkps[i] + jump) + 1)
+        if splits.size:
+            bkps[i] = int(splits[np.argmin(cost.cost(lo, splits) + cost.cost(splits, hi))])
+    return bkps
+
+
+def _best_split(cost: SegmentCost, start: int, end: int, min_size: int, jump: int):
+    """Best single split of x[start:end] as (gain, split); None if the segment is too short"""
+    splits = np.arange(start + min_size, end - min_size + 1)
+    if jump > 1:
+        splits = splits[splits % jump == 0]
+    if splits.size == 0:
+        return None
+
+    total = cost.cost(start, end)
+    split_costs = cost.cost(start, splits) + cost.cost(splits, end)
+    best = np.argmin(split_costs)
+    return total - split_costs[best], int(splits[best])
+
+
+def _binseg(cost: SegmentCost, n_bkps: Optional[int], penalty: Optional[float],
+            min_size: int, jump: int) -> List[int]:
+    """Binary segmentation, stopping after n_bkps splits or when the gain drops below penalty"""
+    heap = []
+
+    def push(start, end):
+        found = _best_split(cost, start, end, min_size, jump)
+        if found is not None:
+            gain, split = found
+            heapq.heappush(heap, (-gain, split, start, end))
+
+    push(0, cost.n)
+    breakpoints = [cost.n]
+    while heap:
+        if n_bkps is not None and len(breakpoints) - 1 >= n_bkps:
+            break
+        neg_gain, split, start, end = heapq.heappop(heap)
+        if penalty is not None and -neg_gain <= penalty:
+            break
+        breakpoints.append(split)
+        push(start, split)
+        push(split, end)
+
+    return sorted(breakpoints)
+
+
+class ChangePointDetector:
+    """
+    Exact multiple change point detection with PELT or binary segmentation.
+
+    Breakpoints follow the usual convention: sorted segment end indices,
+    the last one always being len(signal).
+    """
+
+    def __init__(self, model: str = "meanvar", method: str = "binseg",
+                 min_size: int = 2, jump: int = 1):
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method '{method}', expected one of {SEARCH_METHODS}")
+        if model not in COST_MODELS:
+            raise ValueError(f"Unknown cost model '{model}', expected one of {COST_MODELS}")
+        if min_size < 1 or jump < 1:
+            raise ValueError("min_size and jump must be positive")
+
+        self.model = model
+        self.method = method
+        self.min_size = min_size
+        self.jump = jump
+        self.cost_ = None
+
+    def fit(self, signal) -> "ChangePointDetector":
+        """Precompute the cumulative sums for signal"""
+        self.cost_ = SegmentCost(signal, self.model)
+        return self
+
+    def predict(self, n_changepoints: Optional[int] = None,
+                penalty: Optional[float] = None) -> List[int]:
+        """
+        Return breakpoints for a fixed number of change points or a penalty.
+
+        PELT needs a penalty (defaults to BIC); binary segmentation accepts either
+        and defaults to MODEL_CONFIG["n_changepoints"].
+        """
+        if self.cost_ is None:
+            raise RuntimeError("Call fit() before predict()")
+        if self.cost_.n < 2 * self.min_size:
+            return [self.cost_.n]
+
+        if self.method == "pelt":
+            if n_changepoints is not None:
+                raise ValueError("PELT is penalty-based; use method='binseg' for a fixed number of change points")
+            if penalty is None:
+                penalty = self.cost_.default_penalty()
+            return _pelt(self.cost_, penalty, self.min_size, self.jump)
+
+        if n_changepoints is None and penalty is None:
+            n_changepoints = MODEL_CONFIG["n_changepoints"]
+        return _binseg(self.cost_, n_changepoints, penalty, self.min_size, self.jump)
+
+    def fit_predict(self, signal, n_changepoints: Optional[int] = None,
+                    penalty: Optional[float] = None) -> List[int]:
+        return self.fit(signal).predict(n_changepoints=n_changepoints, penalty=penalty)
+
+
+def summarize_segments(df: pd.DataFrame, breakpoints: List[int],
+                       date_col: str = "Date", value_col: str = "log_return") -> pd.DataFrame:
+    """Per-segment date span and mean/volatility of price and value_col"""
+    bounds = np.r_[0, breakpoints]
+    values = df[value_col].to_numpy(dtype=np.float64)
+    prices = df["Price"].to_numpy(dtype=np.float64) if "Price" in df.columns else None
+    dates = df[date_col].to_numpy()
+
+    rows = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        row = {
+            "segment_start": dates[start],
+            "segment_end": dates[end - 1],
+            "n_obs": int(end - start),
+            f"{value_col}_mean": float(values[start:end].mean()),
+            f"{value_col}_std": float(values[start:end].std()),
+        }
+        if prices is not None:
+            row["price_mean"] = float(prices[start:end].mean())
+            row["price_std"] = float(prices[start:end].std())
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@log_execution
+def detect_change_points(df: pd.DataFrame, column: str = "log_return", model: str = "meanvar",
+                         method: str = "binseg", n_changepoints: Optional[int] = None,
+                         penalty: Optional[float] = None, min_size: int = 30,
+                         jump: Union[int, str, None] = None, date_col: str = "Date") -> pd.DataFrame:
+    """
+    Detect change points in df[column] and return one row per change point
+    with its date, index and the segment statistics on either side.
+
+    jump=None searches every index (exact), except for PELT on series longer
+    than PELT_AUTO_JUMP_ROWS. There, and whenever jump="auto", PELT searches
+    a grid of at most PELT_MAX_GRID points and refines each change point to
+    the best exact index nearby; the result is approximate and a warning is
+    logged.
+    """
+    try:
+        df = df.sort_values(date_col).reset_index(drop=True)
+        coarse = method == "pelt" and (jump == "auto" or (jump is None and len(df) > PELT_AUTO_JUMP_ROWS))
+        if coarse:
+            jump = auto_jump(len(df))
+        elif jump in (None, "auto"):
+            jump = 1
+        refine = coarse and jump > 1
+        if refine:
+            logger.warning(f"PELT on {len(df)} rows: searching every {jump}th index and refining, "
+                           f"change points are approximate (pass jump=1 for the exact search)")
+
+        detector = ChangePointDetector(model=model, method=method, min_size=min_size, jump=jump)
+        breakpoints = detector.fit_predict(df[column].to_numpy(), n_changepoints=n_changepoints,
+                                           penalty=penalty)
+        if refine:
+            breakpoints = _refine(detector.cost_, breakpoints, min_size, jump)
+        segments = summarize_segments(df, breakpoints, date_col=date_col, value_col=column)
+
+        change_idx = np.asarray(breakpoints[:-1], dtype=np.int64)
+        before = segments.iloc[:-1].reset_index(drop=True)
+        after = segments.iloc[1:].reset_index(drop=True)
+
+        result = pd.DataFrame({
+            "change_point_index": change_idx,
+            "change_point_date": df[date_col].to_numpy()[change_idx],
+            f"{column}_mean_before": before[f"{column}_mean"],
+            f"{column}_mean_after": after[f"{column}_mean"],
+            f"{column}_std_before": before[f"{column}_std"],
+            f"{column}_std_after": after[f"{column}_std"],
+        })
+        if "Price" in df.columns:
+            result["price_at_change"] = df["Price"].to_numpy()[change_idx]
+            result["price_mean_before"] = before["price_mean"]
+            result["price_mean_after"] = after["price_mean"]
+
+        logger.info(f"Detected {len(result)} change points with {method}/{model}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Change point detection failed: {str(e)}")
+        raise
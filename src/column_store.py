@@ -0,0 +1,186 @@
+# src/column_store.py
+import io
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+# Suffix of the boolean null mask stored next to each string column
+NULL_MASK_SUFFIX = ".isnull.npy"
+
+
+def _string_column(series: pd.Series):
+    """Fixed-width string values of an object column and its null mask"""
+    mask = series.isna().to_numpy()
+    values = series.to_numpy().astype(str)
+    values[mask] = ""
+    return values, mask
+
+
+def _append_npy(path: Path, values: np.ndarray):
+    """
+    Append values to a 1-D .npy file in place, rewriting only the header.
+
+    numpy pads .npy headers so the length can grow without moving the data;
+    if the new header still doesn't fit (or strings widen) the file is rewritten.
+    """
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+
+        fits = not (dtype.kind == "U" and values.dtype.itemsize > dtype.itemsize)
+        header = io.BytesIO()
+        header_dict = {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": fortran_order,
+            "shape": (shape[0] + len(values),),
+        }
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(header, header_dict)
+        else:
+            np.lib.format.write_array_header_2_0(header, header_dict)
+
+        if fits and len(header.getvalue()) == data_offset:
+            f.seek(0, io.SEEK_END)
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            f.seek(0)
+            f.write(header.getvalue())
+            return
+
+    existing = np.load(path, allow_pickle=False)
+    np.save(path, np.concatenate((existing, values)), allow_pickle=False)
+
+
+class ColumnStore:
+    """
+    Typed columnar store: one .npy file per column, one directory per table.
+
+    Each table carries a manifest with the fingerprint of the inputs it was
+    built from, so callers can tell whether a rebuild is needed. Columns can
+    be memory-mapped, giving zero-copy datetime64/float64 arrays.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR):
+        self.root = Path(root)
+
+    def _table_dir(self, table: str) -> Path:
+        return self.root / table
+
+    def manifest(self, table: str) -> Optional[dict]:
+        path = self._table_dir(table) / MANIFEST_NAME
+        if not path.exists():
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def fingerprint(self, table: str) -> Optional[str]:
+        manifest = self.manifest(table)
+        return manifest["fingerprint"] if manifest else None
+
+    def set_fingerprint(self, table: str, fingerprint: str):
+        """Re-stamp an existing table, e.g. after an append its inputs already account for"""
+        manifest = self.manifest(table)
+        if manifest is None:
+            raise FileNotFoundError(f"No stored table '{table}' in {self.root}")
+        manifest["fingerprint"] = fingerprint
+        with open(self._table_dir(table) / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def write(self, table: str, df: pd.DataFrame, fingerprint: str):
+        """Replace table with the columns of df"""
+        target = self._table_dir(table)
+        staging = self.root / f".{table}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+
+        columns, string_columns = [], []
+        for col in df.columns:
+            values = df[col].to_numpy()
+            if values.dtype == object:
+                values, mask = _string_column(df[col])
+                np.save(staging / f"{col}{NULL_MASK_SUFFIX}", mask, allow_pickle=False)
+                string_columns.append(col)
+            np.save(staging / f"{col}.npy", values, allow_pickle=False)
+            columns.append(col)
+
+        manifest = {"fingerprint": fingerprint, "columns": columns,
+                    "string_columns": string_columns, "rows": len(df)}
+        with open(staging / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap in the new table only once it is complete
+        if target.exists():
+            shutil.rmtree(target)
+        staging.rename(target)
+        logger.info(f"Stored {len(df)} rows of '{table}' in {target}")
+
+    def append(self, table: str, df: pd.DataFrame):
+        """Append the rows of df to an existing table (same columns)"""
+        manifest = self.manifest(table)
+        if manifest is None:
+            raise FileNotFoundError(f"No stored table '{table}' in {self.root}")
+        if list(df.columns) != manifest["columns"]:
+            raise ValueError(f"Columns {list(df.columns)} don't match stored columns {manifest['columns']}")
+        if len(df) == 0:
+            return
+
+        table_dir = self._table_dir(table)
+        string_columns = set(manifest.get("string_columns", []))
+        for col in manifest["columns"]:
+            values = df[col].to_numpy()
+            if col in string_columns:
+                values, mask = _string_column(df[col].astype(object))
+                _append_npy(table_dir / f"{col}{NULL_MASK_SUFFIX}", mask)
+            elif values.dtype == object:
+                values = values.astype(str)
+            _append_npy(table_dir / f"{col}.npy", values)
+
+        manifest["rows"] += len(df)
+        manifest["appended_rows"] = manifest.get("appended_rows", 0) + len(df)
+        with open(table_dir / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Appended {len(df)} rows to '{table}'")
+
+    def read_arrays(self, table: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+        """Column arrays of table, memory-mapped read-only when mmap is True"""
+        manifest = self.manifest(table)
+        if manifest is None:
+            raise FileNotFoundError(f"No stored table '{table}' in {self.root}")
+
+        mode = "r" if mmap else None
+        table_dir = self._table_dir(table)
+        return {
+            col: np.load(table_dir / f"{col}.npy", mmap_mode=mode, allow_pickle=False)
+            for col in manifest["columns"]
+        }
+
+    def read_frame(self, table: str, mmap: bool = True) -> pd.DataFrame:
+        """
+        DataFrame view over the stored columns (numeric/datetime columns are not
+        copied); string columns come back as object with their nulls restored
+        """
+        manifest = self.manifest(table)
+        arrays = self.read_arrays(table, mmap=mmap)
+        table_dir = self._table_dir(table)
+        for col in manifest.get("string_columns", []):
+            values = arrays[col].astype(object)
+            values[np.load(table_dir / f"{col}{NULL_MASK_SUFFIX}", allow_pickle=False)] = np.nan
+            arrays[col] = values
+        for col, values in arrays.items():
+            if values.dtype.kind == "U":
+                arrays[col] = values.astype(object)
+        return pd.DataFrame(arrays, copy=False)
@@ -8,17 +8,33 @@ PROJECT_DIR = Path(__file__).parent.parent
 DATA_DIR = PROJECT_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
+CACHE_DIR = PROCESSED_DATA_DIR / "cache"
+SWEEP_CACHE_DIR = CACHE_DIR / "sweep"
+BENCHMARK_DIR = PROJECT_DIR / "benchmarks"
 
 # Data files
 BRENT_RAW_PATH = RAW_DATA_DIR / "BrentOilPrices.csv"
 EVENTS_RAW_PATH = RAW_DATA_DIR / "events.csv"
+# Prints accepted by DataProcessor.append, kept so a full rebuild reproduces them
+BRENT_APPENDED_RAW_PATH = RAW_DATA_DIR / "brent_appended.csv"
 
 BRENT_PROCESSED_PATH = PROCESSED_DATA_DIR / "brent_processed.csv"
 EVENTS_PROCESSED_PATH = PROCESSED_DATA_DIR / "events_processed.csv"
 
 # Date ranges (all timezone-naive)
 DEFAULT_START_DATE = datetime(1987, 5, 20)  # No timezone
-DEFAULT_END_DATE = datetime(2022, 9, 30)    # No timezone
+DEFAULT_END_DATE = None                     # None: up to the last available observation
+
+# Explicit date formats tried in order before falling back to per-element parsing
+# (e.g. "20-May-87", "Apr 22, 2020", "2022-09-30", "8/2/1990"). The slash format
+# fixes the day/month order: slash dates it rejects are left unparsed, not guessed
+# (see utils.parse_dates)
+DATE_FORMATS = ["%d-%b-%y", "%b %d, %Y", "%Y-%m-%d", "%m/%d/%Y"]
+
+# Panel ingestion defaults (long layout: one row per date and instrument)
+PANEL_DATE_COL = "Date"
+PANEL_INSTRUMENT_COL = "Instrument"
+PANEL_VALUE_COL = "Price"
 
 # Model configuration
 MODEL_CONFIG = {
@@ -2,9 +2,10 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from src.config import *
-from src.utils import validate_date_range, log_execution
+from src.utils import validate_date_range, log_execution, fingerprint_inputs, parse_dates
+from src.column_store import ColumnStore
 import warnings
-from typing import Tuple
+from typing import Tuple, Optional, Union, Sequence
 import logging
 
 warnings.filterwarnings('ignore')
@@ -12,13 +13,18 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
-    def __init__(self):
+    # Bump when processing logic changes so cached outputs are rebuilt
+    PROCESSING_VERSION = 3
+
+    def __init__(self, store: Optional[ColumnStore] = None):
         self._ensure_directories_exist()
+        self.store = store or ColumnStore()
 
     def _ensure_directories_exist(self):
         """Create required directories if they don't exist"""
         try:
             PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
         except Exception as e:
             logger.error(f"Failed to create directories: {str(e)}")
             raise
@@ -51,24 +57,41 @@ class DataProcessor:
         if df['Event_name'].isnull().any():
             raise ValueError("Events data contains null names")
 
+    def _input_fingerprint(self) -> str:
+        """Hash of the raw files and the parameters that shape the processed output"""
+        paths = [BRENT_RAW_PATH, EVENTS_RAW_PATH]
+        if BRENT_APPENDED_RAW_PATH.exists():
+            paths.append(BRENT_APPENDED_RAW_PATH)
+        return fingerprint_inputs(
+            paths,
+            start_date=DEFAULT_START_DATE,
+            end_date=DEFAULT_END_DATE,
+            date_formats=DATE_FORMATS,
+            version=self.PROCESSING_VERSION
+        )
+
+    def is_cache_valid(self, fingerprint: Optional[str] = None) -> bool:
+        """True if the stored outputs were built from the current inputs"""
+        fingerprint = fingerprint or self._input_fingerprint()
+        return (self.store.fingerprint('brent') == fingerprint and
+                self.store.fingerprint('events') == fingerprint)
+
     @log_execution
     def load_raw_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Load and validate raw data files"""
         try:
             logger.info("Loading Brent data...")
-            brent = pd.read_csv(
-                BRENT_RAW_PATH,
-                parse_dates=['Date'],
-                dayfirst=True
-            )
+            brent = pd.read_csv(BRENT_RAW_PATH)
+            if BRENT_APPENDED_RAW_PATH.exists():
+                appended = pd.read_csv(BRENT_APPENDED_RAW_PATH)
+                logger.info(f"Including {len(appended)} appended prints from {BRENT_APPENDED_RAW_PATH.name}")
+                brent = pd.concat([brent, appended[['Date', 'Price']]], ignore_index=True)
+            brent['Date'] = parse_dates(brent['Date'], DATE_FORMATS)
             self._validate_brent_data(brent)
 
             logger.info("Loading Events data...")
-            events = pd.read_csv(
-                EVENTS_RAW_PATH,
-                parse_dates=['Event_date'],
-                infer_datetime_format=True
-            )
+            events = pd.read_csv(EVENTS_RAW_PATH)
+            events['Event_date'] = parse_dates(events['Event_date'], DATE_FORMATS)
             self._validate_events_data(events)
 
             return brent, events
@@ -106,6 +129,81 @@ class DataProcessor:
             logger.error(f"Brent data processing failed: {str(e)}")
             raise
 
+    @log_execution
+    def append(self, new_rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append new Brent prints to the processed store, processing only the
+        days after the last stored observation. Accepted raw rows are also
+        kept in BRENT_APPENDED_RAW_PATH, which load_raw_data reads, so a
+        full rebuild gives the same series. A store that no longer matches
+        the inputs is rebuilt first.
+        """
+        try:
+            new = new_rows[['Date', 'Price']].copy()
+            if pd.api.types.is_datetime64_any_dtype(new['Date']):
+                new['Date'] = new['Date'].dt.tz_localize(None)
+            else:
+                # Raw-style prints are read exactly as load_raw_data reads BrentOilPrices.csv
+                new['Date'] = parse_dates(new['Date'], DATE_FORMATS)
+            self._validate_brent_data(new)
+
+            if self.store.manifest('brent') is None:
+                raise FileNotFoundError("No processed Brent data to append to, run the pipeline first")
+            if not self.is_cache_valid():
+                # Appending to a stale store and re-stamping it would hide the input change
+                logger.warning("Processed data is out of date with the raw inputs, rebuilding before append")
+                self.run_pipeline(force=True)
+            manifest = self.store.manifest('brent')
+
+            stored = self.store.read_arrays('brent')
+            last_date = pd.Timestamp(stored['Date'][-1])
+            last_price = float(stored['Price'][-1])
+            del stored
+
+            stale = new['Date'] <= last_date
+            if stale.any():
+                logger.warning(f"Ignoring {stale.sum()} rows on or before last stored date {last_date.date()}")
+            new = new[~stale]
+
+            if new.empty:
+                logger.info("No new trading days to append")
+                return pd.DataFrame(columns=manifest['columns'])
+
+            # Anchor on the last stored day so interpolation and returns are continuous across the seam
+            anchor = pd.DataFrame({'Date': [last_date], 'Price': [last_price]})
+            tail = (
+                pd.concat([anchor, new])
+                .sort_values('Date')
+                .drop_duplicates('Date')
+                .set_index('Date')
+                .asfreq('D')
+                .interpolate(method='time')
+            )
+            prices = tail['Price'].to_numpy()
+            tail = tail.iloc[1:].reset_index()
+            tail['log_return'] = np.log(prices[1:]) - np.log(prices[:-1])
+            tail['pct_change'] = (prices[1:] / prices[:-1] - 1) * 100
+
+            tail = validate_date_range(tail, 'Date', DEFAULT_START_DATE, DEFAULT_END_DATE)
+            tail = tail[manifest['columns']].reset_index(drop=True)
+
+            # Record the raw prints first: if the store write fails, a rebuild still picks them up
+            new.to_csv(BRENT_APPENDED_RAW_PATH, mode='a', index=False, date_format='%Y-%m-%d',
+                       header=not BRENT_APPENDED_RAW_PATH.exists())
+            self.store.append('brent', tail)
+            tail.to_csv(BRENT_PROCESSED_PATH, mode='a', header=False, index=False)
+
+            # The store now matches a rebuild from the extended raw inputs
+            fingerprint = self._input_fingerprint()
+            self.store.set_fingerprint('brent', fingerprint)
+            self.store.set_fingerprint('events', fingerprint)
+            logger.info(f"Appended {len(tail)} days up to {tail['Date'].iloc[-1].date()}")
+            return tail
+
+        except Exception as e:
+            logger.error(f"Brent append failed: {str(e)}")
+            raise
+
     @log_execution
     def process_events_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process events data"""
@@ -127,8 +225,9 @@ class DataProcessor:
             raise
 
     @log_execution
-    def save_processed_data(self, brent_df: pd.DataFrame, events_df: pd.DataFrame):
-        """Save processed data to CSV"""
+    def save_processed_data(self, brent_df: pd.DataFrame, events_df: pd.DataFrame,
+                            fingerprint: Optional[str] = None):
+        """Save processed data to CSV and the columnar store"""
         try:
             logger.info(f"Saving Brent data to: {BRENT_PROCESSED_PATH}")
             logger.info(f"Saving Events data to: {EVENTS_PROCESSED_PATH}")
@@ -136,20 +235,200 @@ class DataProcessor:
             brent_df.to_csv(BRENT_PROCESSED_PATH, index=False)
             events_df.to_csv(EVENTS_PROCESSED_PATH, index=False)
 
+            fingerprint = fingerprint or self._input_fingerprint()
+            self.store.write('brent', brent_df.reset_index(drop=True), fingerprint)
+            self.store.write('events', events_df.reset_index(drop=True), fingerprint)
+
             logger.info("Data saved successfully")
 
         except Exception as e:
             logger.error(f"Failed to save processed data: {str(e)}")
             raise
 
-    def run_pipeline(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        """Run the full processing pipeline"""
+    @log_execution
+    def load_panel(self, source: Union[str, Path, Sequence[Union[str, Path]]],
+                   layout: str = 'auto', date_col: str = PANEL_DATE_COL,
+                   instrument_col: str = PANEL_INSTRUMENT_COL,
+                   value_col: str = PANEL_VALUE_COL) -> pd.DataFrame:
+        """
+        Load many price series into one long frame (Date, Instrument, Price).
+
+        source is a long CSV (one row per date and instrument), a wide CSV
+        (a date column plus one column per instrument), a directory of CSVs,
+        or a list of CSVs. Each file is read with layout; 'auto' detects it
+        per file: long if it has instrument_col, 'series' (a two-column
+        file whose values belong to the instrument named after the file)
+        for two-column files in a directory or list or with value_col as
+        their only value column, wide otherwise. Dates are parsed once over
+        the concatenated column.
+        """
+        try:
+            if isinstance(source, (str, Path)) and Path(source).is_dir():
+                files = sorted(Path(source).glob('*.csv'))
+                if not files:
+                    raise ValueError(f"No CSV files found in {source}")
+                multi_file = True
+            elif isinstance(source, (str, Path)):
+                files, multi_file = [Path(source)], False
+            else:
+                files, multi_file = [Path(f) for f in source], True
+
+            frames = [self._read_panel_file(f, layout, date_col, instrument_col, value_col, multi_file)
+                      for f in files]
+            panel = pd.concat(frames, ignore_index=True)
+            panel[date_col] = parse_dates(panel[date_col], DATE_FORMATS)
+            panel[value_col] = pd.to_numeric(panel[value_col], errors='coerce')
+            panel = panel.rename(columns={date_col: 'Date', instrument_col: 'Instrument', value_col: 'Price'})
+            self._validate_panel_data(panel)
+            return panel
+
+        except Exception as e:
+            logger.error(f"Panel loading failed: {str(e)}")
+            raise
+
+    def _read_panel_file(self, path: Path, layout: str, date_col: str, instrument_col: str,
+                         value_col: str, multi_file: bool = False) -> pd.DataFrame:
+        """Read one panel file into long (date, instrument, value) rows with raw date strings"""
+        df = pd.read_csv(path, dtype={date_col: str})
+        if date_col not in df.columns:
+            raise ValueError(f"{path.name} has no '{date_col}' column")
+
+        if layout == 'auto':
+            if instrument_col in df.columns:
+                layout = 'long'
+            elif len(df.columns) == 2 and (multi_file or value_col in df.columns):
+                layout = 'series'
+            else:
+                layout = 'wide'
+
+        if layout == 'long':
+            return df[[date_col, instrument_col, value_col]]
+        if layout == 'series':
+            if len(df.columns) != 2:
+                raise ValueError(f"{path.name} has {len(df.columns)} columns, the 'series' layout "
+                                 f"expects '{date_col}' plus one value column")
+            column = next(c for c in df.columns if c != date_col)
+            return pd.DataFrame({date_col: df[date_col], instrument_col: path.stem, value_col: df[column]})
+        if layout == 'wide':
+            return df.melt(id_vars=date_col, var_name=instrument_col, value_name=value_col).dropna(subset=[value_col])
+        raise ValueError(f"Unknown panel layout '{layout}', expected 'auto', 'long', 'series' or 'wide'")
+
+    def _validate_panel_data(self, df: pd.DataFrame):
+        """Validate a long panel, reporting the offending instruments"""
+        if df['Date'].isnull().any():
+            bad = df.loc[df['Date'].isnull(), 'Instrument'].unique().tolist()
+            raise ValueError(f"Unparseable dates for instruments: {bad[:5]}")
+
+        if df['Price'].isnull().any():
+            bad = df.loc[df['Price'].isnull(), 'Instrument'].unique().tolist()
+            raise ValueError(f"Null or non-numeric prices for instruments: {bad[:5]}")
+
+        if (df['Price'] <= 0).any():
+            bad = df.loc[df['Price'] <= 0, 'Instrument'].unique().tolist()
+            raise ValueError(f"Non-positive prices for instruments: {bad[:5]}")
+
+    @log_execution
+    def process_panel(self, panel: pd.DataFrame) -> pd.DataFrame:
+        """
+        Align every instrument to one daily calendar and compute returns
+        column-wise. Returns wide frames under a (field, instrument) column
+        MultiIndex: panel_df['log_return']['WTI'].
+        """
+        try:
+            # Scatter the long rows into one (date x instrument) array
+            date_codes, dates = pd.factorize(panel['Date'], sort=True)
+            inst_codes, instruments = pd.factorize(panel['Instrument'], sort=True)
+            keys = date_codes * len(instruments) + inst_codes
+            values = panel['Price'].to_numpy(dtype=np.float64)
+
+            order = np.argsort(keys, kind='stable')
+            sorted_keys, sorted_values = keys[order], values[order]
+            repeated = sorted_keys[1:] == sorted_keys[:-1]
+            if repeated.any():
+                conflicting = repeated & (sorted_values[1:] != sorted_values[:-1])
+                if conflicting.any():
+                    bad = np.unique(instruments[sorted_keys[1:][conflicting] % len(instruments)]).tolist()
+                    raise ValueError(f"Conflicting prices for the same date in instruments: {bad[:5]}")
+                logger.warning(f"Dropping {repeated.sum()} exact duplicate (date, instrument) rows")
+
+            keys, first = np.unique(keys, return_index=True)
+            grid = np.full(len(dates) * len(instruments), np.nan)
+            grid[keys] = values[first]
+
+            prices = (
+                pd.DataFrame(
+                    grid.reshape(len(dates), len(instruments)),
+                    index=pd.DatetimeIndex(dates, name='Date'),
+                    columns=pd.Index(instruments, name='Instrument')
+                )
+                .asfreq('D')
+                # Fill gaps inside each instrument's history only, never before listing or after expiry
+                .interpolate(method='time', limit_area='inside')
+            )
+
+            values = prices.to_numpy(dtype=np.float64)
+            log_values = np.log(values)
+            log_return = np.full_like(values, np.nan)
+            pct_change = np.full_like(values, np.nan)
+            log_return[1:] = log_values[1:] - log_values[:-1]
+            pct_change[1:] = (values[1:] / values[:-1] - 1) * 100
+
+            result = pd.concat({
+                'Price': prices,
+                'log_return': pd.DataFrame(log_return, index=prices.index, columns=prices.columns),
+                'pct_change': pd.DataFrame(pct_change, index=prices.index, columns=prices.columns),
+            }, axis=1, names=['field']).iloc[1:]
+
+            in_range = validate_date_range(
+                pd.DataFrame({'Date': result.index}), 'Date', DEFAULT_START_DATE, DEFAULT_END_DATE
+            ).index
+            result = result.iloc[in_range]
+            logger.info(f"Processed panel of {prices.shape[1]} instruments over {len(result)} days")
+            return result
+
+        except Exception as e:
+            logger.error(f"Panel processing failed: {str(e)}")
+            raise
+
+    def run_panel_pipeline(self, source: Union[str, Path, Sequence[Union[str, Path]]], **kwargs) -> pd.DataFrame:
+        """Load and process a multi-instrument panel"""
+        return self.process_panel(self.load_panel(source, **kwargs))
+
+    def load_processed_data(self, mmap: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Load processed data from the columnar store without CSV parsing"""
+        try:
+            return self.store.read_frame('brent', mmap=mmap), self.store.read_frame('events', mmap=mmap)
+        except Exception as e:
+            logger.error(f"Failed to load processed data: {str(e)}")
+            raise
+
+    def load_processed_arrays(self, table: str = 'brent', mmap: bool = True) -> dict:
+        """Memory-mapped column arrays of a processed table ('brent' or 'events')"""
+        return self.store.read_arrays(table, mmap=mmap)
+
+    def run_pipeline(self, force: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Run the full processing pipeline, skipping it when the inputs are unchanged.
+        Always returns writable frames; use load_processed_data(mmap=True) for zero-copy reads.
+        """
         try:
+            fingerprint = self._input_fingerprint()
+            if not force and self.is_cache_valid(fingerprint):
+                logger.info("Inputs unchanged, loading processed data from cache")
+                brent_processed, events_processed = self.load_processed_data(mmap=False)
+                # The notebooks read the CSVs, so restore them if they were removed
+                if not BRENT_PROCESSED_PATH.exists():
+                    brent_processed.to_csv(BRENT_PROCESSED_PATH, index=False)
+                if not EVENTS_PROCESSED_PATH.exists():
+                    events_processed.to_csv(EVENTS_PROCESSED_PATH, index=False)
+                return brent_processed, events_processed
+
             logger.info("Starting data processing pipeline...")
             brent_raw, events_raw = self.load_raw_data()
-            brent_processed = self.process_brent_data(brent_raw)
+            # Same RangeIndex as a cache hit
+            brent_processed = self.process_brent_data(brent_raw).reset_index(drop=True)
             events_processed = self.process_events_data(events_raw)
-            self.save_processed_data(brent_processed, events_processed)
+            self.save_processed_data(brent_processed, events_processed, fingerprint)
             logger.info("Pipeline completed successfully")
             return brent_processed, events_processed
         except Exception as e:
@@ -0,0 +1,167 @@
+# src/event_impact.py
+import logging
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import EVENT_MATCH_WINDOW_DAYS, MIN_EVENT_IMPACT
+from src.utils import log_execution
+
+logger = logging.getLogger(__name__)
+
+IMPACT_LEVELS = {"Low": 0, "Medium": 1, "High": 2}
+
+
+def filter_events_by_impact(events_df: pd.DataFrame, min_impact: Optional[str] = MIN_EVENT_IMPACT,
+                            impact_col: str = "Expected_Impact") -> pd.DataFrame:
+    """Keep events whose expected impact is at least min_impact (Low < Medium < High)"""
+    if min_impact is None:
+        return events_df
+    if min_impact not in IMPACT_LEVELS:
+        raise ValueError(f"Unknown impact level '{min_impact}', expected one of {list(IMPACT_LEVELS)}")
+
+    levels = events_df[impact_col].str.strip().str.capitalize().map(IMPACT_LEVELS)
+    return events_df[levels >= IMPACT_LEVELS[min_impact]]
+
+
+class PriceIndex:
+    """
+    Sorted date index with prefix sums of price and log returns, so any
+    window mean/volatility is two searchsorted lookups and a subtraction.
+    """
+
+    def __init__(self, dates, prices, log_returns=None):
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        prices = np.asarray(prices, dtype=np.float64)
+        if log_returns is None:
+            log_returns = np.r_[np.nan, np.diff(np.log(prices))]
+        log_returns = np.asarray(log_returns, dtype=np.float64)
+
+        order = np.argsort(dates, kind="stable")
+        self.dates = dates[order]
+        prices = prices[order]
+        log_returns = np.nan_to_num(log_returns[order])
+
+        self.price_cs = np.concatenate(([0.0], np.cumsum(prices)))
+        self.ret_cs = np.concatenate(([0.0], np.cumsum(log_returns)))
+        self.ret2_cs = np.concatenate(([0.0], np.cumsum(log_returns * log_returns)))
+
+    @classmethod
+    def from_frame(cls, price_df: pd.DataFrame, date_col: str = "Date", price_col: str = "Price",
+                   return_col: Optional[str] = "log_return") -> "PriceIndex":
+        returns = price_df[return_col].to_numpy() if return_col in price_df.columns else None
+        return cls(price_df[date_col].to_numpy(), price_df[price_col].to_numpy(), returns)
+
+    def bounds(self, start, end, left_closed: bool, right_closed: bool):
+        """Index range [lo, hi) of observations between start and end"""
+        lo = np.searchsorted(self.dates, start, side="left" if left_closed else "right")
+        hi = np.searchsorted(self.dates, end, side="right" if right_closed else "left")
+        return lo, np.maximum(hi, lo)
+
+    @staticmethod
+    def _window_sum(cs, lo, hi):
+        return cs[hi] - cs[lo]
+
+    def window_stats(self, lo, hi):
+        """Mean price, sum and volatility of log returns for index ranges [lo, hi)"""
+        n = (hi - lo).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_price = self._window_sum(self.price_cs, lo, hi) / n
+            ret_sum = self._window_sum(self.ret_cs, lo, hi)
+            ret2_sum = self._window_sum(self.ret2_cs, lo, hi)
+            variance = (ret2_sum - ret_sum * ret_sum / n) / (n - 1)
+            volatility = np.sqrt(np.maximum(variance, 0.0))
+        mean_price = np.where(n > 0, mean_price, np.nan)
+        volatility = np.where(n > 1, volatility, np.nan)
+        return n, mean_price, ret_sum, volatility
+
+
+@log_execution
+def calculate_event_impact(price_df: pd.DataFrame, events_df: pd.DataFrame,
+                           window_days: Iterable[int] = (5,),
+                           min_impact: Optional[str] = MIN_EVENT_IMPACT,
+                           index: Optional[PriceIndex] = None) -> pd.DataFrame:
+    """
+    Price impact around every event for every window size in one batched pass.
+
+    For an event on day d and window w the pre-event window is [d - w, d) and
+    the post-event window is (d, d + w]. Returns one row per (event, window)
+    with pre/post mean price, absolute and percent change, cumulative abnormal
+    log return (post-window return minus the pre-window mean daily return) and
+    the change in log-return volatility. Events with an empty window are dropped.
+    """
+    try:
+        events = filter_events_by_impact(events_df, min_impact)
+        index = index or PriceIndex.from_frame(price_df)
+
+        windows = np.atleast_1d(np.asarray(list(window_days), dtype=np.int64))
+        event_dates = pd.to_datetime(events["Event_date"]).to_numpy(dtype="datetime64[ns]")
+
+        # Shape (events, windows)
+        d = event_dates[:, None]
+        w = windows[None, :].astype("timedelta64[D]")
+        pre_lo, pre_hi = index.bounds(d - w, d, left_closed=True, right_closed=False)
+        post_lo, post_hi = index.bounds(d, d + w, left_closed=False, right_closed=True)
+
+        pre_n, pre_price, pre_ret, pre_vol = index.window_stats(pre_lo, pre_hi)
+        post_n, post_price, post_ret, post_vol = index.window_stats(post_lo, post_hi)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            expected_ret = np.where(pre_n > 0, pre_ret / pre_n, 0.0)
+            car = post_ret - expected_ret * post_n
+            vol_change = (post_vol / pre_vol - 1) * 100
+
+        n_events, n_windows = d.shape[0], windows.size
+        result = pd.DataFrame({
+            "event": np.repeat(events["Event_name"].to_numpy(), n_windows),
+            "date": np.repeat(event_dates, n_windows),
+            "window_days": np.tile(windows, n_events),
+            "pre_price": pre_price.ravel(),
+            "post_price": post_price.ravel(),
+            "abs_change": (post_price - pre_price).ravel(),
+            "pct_change": ((post_price - pre_price) / pre_price * 100).ravel(),
+            "car": car.ravel(),
+            "pre_volatility": pre_vol.ravel(),
+            "post_volatility": post_vol.ravel(),
+            "volatility_change": vol_change.ravel(),
+        })
+        return result.dropna(subset=["pre_price", "post_price"]).reset_index(drop=True)
+
+    except Exception as e:
+        logger.error(f"Event impact calculation failed: {str(e)}")
+        raise
+
+
+def match_events_to_change_points(change_dates: Sequence, events_df: pd.DataFrame,
+                                  window_days: int = EVENT_MATCH_WINDOW_DAYS,
+                                  min_impact: Optional[str] = MIN_EVENT_IMPACT) -> pd.DataFrame:
+    """
+    Nearest qualifying event within window_days of each change point date.
+    Change points with no event in range get NaN event columns.
+    """
+    events = filter_events_by_impact(events_df, min_impact).sort_values("Event_date")
+    event_dates = pd.to_datetime(events["Event_date"]).to_numpy(dtype="datetime64[ns]")
+    change_dates = pd.to_datetime(pd.Series(change_dates)).to_numpy(dtype="datetime64[ns]")
+
+    result = pd.DataFrame({"change_point_date": change_dates})
+    if len(event_dates) == 0:
+        result["Event_name"] = np.nan
+        result["Event_date"] = pd.NaT
+        result["days_from_change"] = np.nan
+        return result
+
+    # Compare the neighbours on either side of each change point
+    right = np.clip(np.searchsorted(event_dates, change_dates), 0, len(event_dates) - 1)
+    left = np.clip(right - 1, 0, len(event_dates) - 1)
+    gap_right = np.abs(event_dates[right] - change_dates)
+    gap_left = np.abs(event_dates[left] - change_dates)
+    nearest = np.where(gap_left <= gap_right, left, right)
+
+    gap_days = (event_dates[nearest] - change_dates) / np.timedelta64(1, "D")
+    within = np.abs(gap_days) <= window_days
+
+    result["Event_name"] = np.where(within, events["Event_name"].to_numpy()[nearest], np.nan)
+    result["Event_date"] = np.where(within, event_dates[nearest], np.datetime64("NaT"))
+    result["days_from_change"] = np.where(within, gap_days, np.nan)
+    return result
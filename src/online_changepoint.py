@@ -0,0 +1,227 @@
+# src/online_changepoint.py
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+from src.config import BRENT_PROCESSED_PATH
+from src.utils import log_execution
+
+logger = logging.getLogger(__name__)
+
+
+def _checkpoint_path(path) -> Path:
+    """Checkpoint file name with the .npz suffix np.savez would add"""
+    path = Path(path)
+    return path if path.suffix == ".npz" else path.with_name(path.name + ".npz")
+
+
+def _logsumexp(a: np.ndarray) -> float:
+    m = a.max()
+    return m + np.log(np.exp(a - m).sum())
+
+
+class OnlineChangePointDetector:
+    """
+    Bayesian online change point detection (Adams & MacKay, 2007).
+
+    Observations are Normal with unknown mean and variance under a
+    Normal-Inverse-Gamma prior, with a constant hazard of 1 / hazard_lambda.
+    The run-length posterior is truncated at max_run_length and run lengths
+    with probability below prune_threshold are dropped, so memory and per-tick
+    cost stay bounded however long the stream runs.
+
+    An alarm is raised when the probability that the current run started in
+    the last alarm_lag ticks reaches alarm_threshold; it re-arms once that
+    probability falls back below the threshold.
+    """
+
+    PARAMS = ("hazard_lambda", "mu0", "kappa0", "alpha0", "beta0",
+              "max_run_length", "prune_threshold", "alarm_lag", "alarm_threshold")
+
+    def __init__(self, hazard_lambda: float = 250.0, mu0: float = 0.0, kappa0: float = 1.0,
+                 alpha0: float = 1.0, beta0: float = 1e-4, max_run_length: int = 1000,
+                 prune_threshold: float = 1e-10, alarm_lag: int = 5, alarm_threshold: float = 0.5):
+        if hazard_lambda <= 1:
+            raise ValueError("hazard_lambda must be greater than 1")
+        if max_run_length < 1:
+            raise ValueError("max_run_length must be positive")
+
+        self.hazard_lambda = hazard_lambda
+        self.mu0 = mu0
+        self.kappa0 = kappa0
+        self.alpha0 = alpha0
+        self.beta0 = beta0
+        self.max_run_length = max_run_length
+        self.prune_threshold = prune_threshold
+        self.alarm_lag = alarm_lag
+        self.alarm_threshold = alarm_threshold
+        self.reset()
+
+    def reset(self):
+        """Start from an empty stream (run length 0 with probability 1)"""
+        self.t = 0
+        self.last_timestamp = None
+        self.in_alarm = False
+        self.run_lengths = np.zeros(1, dtype=np.int64)
+        self.log_probs = np.zeros(1)
+        self.mu = np.array([self.mu0], dtype=np.float64)
+        self.kappa = np.array([self.kappa0], dtype=np.float64)
+        self.alpha = np.array([self.alpha0], dtype=np.float64)
+        self.beta = np.array([self.beta0], dtype=np.float64)
+
+    def _log_predictive(self, x: float) -> np.ndarray:
+        """Student-t posterior predictive log density of x under each run length"""
+        df = 2.0 * self.alpha
+        scale2 = self.beta * (self.kappa + 1.0) / (self.alpha * self.kappa)
+        z2 = (x - self.mu) ** 2 / scale2
+        return (gammaln((df + 1.0) / 2.0) - gammaln(df / 2.0)
+                - 0.5 * np.log(np.pi * df * scale2)
+                - (df + 1.0) / 2.0 * np.log1p(z2 / df))
+
+    def _step(self, x: float, timestamp=None):
+        """Advance the run-length posterior by one observation"""
+        if not np.isfinite(x):
+            raise ValueError(f"Observation must be finite, got {x}")
+
+        log_hazard = -np.log(self.hazard_lambda)
+        log_survival = np.log1p(-1.0 / self.hazard_lambda)
+
+        joint = self.log_probs + self._log_predictive(x)
+        log_probs = np.concatenate(([_logsumexp(joint) + log_hazard], joint + log_survival))
+        run_lengths = np.concatenate(([0], self.run_lengths + 1))
+
+        # Conjugate update of every surviving run, fresh prior for the new one
+        kappa_new = self.kappa + 1.0
+        mu = np.concatenate(([self.mu0], (self.kappa * self.mu + x) / kappa_new))
+        beta = np.concatenate(([self.beta0], self.beta + self.kappa * (x - self.mu) ** 2 / (2.0 * kappa_new)))
+        kappa = np.concatenate(([self.kappa0], kappa_new))
+        alpha = np.concatenate(([self.alpha0], self.alpha + 0.5))
+
+        log_probs -= _logsumexp(log_probs)
+        keep = log_probs >= np.log(self.prune_threshold)
+        keep[0] = True
+        if keep.sum() > self.max_run_length:
+            # Run lengths are sorted ascending, drop the oldest surviving runs
+            keep[np.flatnonzero(keep)[self.max_run_length:]] = False
+
+        self.run_lengths = run_lengths[keep]
+        self.log_probs = log_probs[keep] - _logsumexp(log_probs[keep])
+        self.mu, self.kappa, self.alpha, self.beta = mu[keep], kappa[keep], alpha[keep], beta[keep]
+        self.t += 1
+        self.last_timestamp = timestamp
+
+    def _check_alarm(self, probs: np.ndarray, map_run_length: int, timestamp):
+        """Alarm dict on a new crossing of alarm_threshold, otherwise None"""
+        recent_change = float(probs[self.run_lengths < self.alarm_lag].sum())
+        # Every run is recent until the stream is longer than alarm_lag
+        if self.t <= self.alarm_lag:
+            return recent_change, None
+
+        alarm = None
+        if recent_change >= self.alarm_threshold and not self.in_alarm:
+            self.in_alarm = True
+            alarm = {
+                "t": self.t,
+                "timestamp": timestamp,
+                "probability": recent_change,
+                "estimated_change_t": self.t - map_run_length,
+            }
+        elif recent_change < self.alarm_threshold:
+            self.in_alarm = False
+        return recent_change, alarm
+
+    def update(self, x: float, timestamp=None) -> Dict[str, Any]:
+        """Consume one observation and return the updated run-length posterior"""
+        x = float(x)
+        self._step(x, timestamp)
+
+        probs = np.exp(self.log_probs)
+        map_run_length = int(self.run_lengths[np.argmax(probs)])
+        recent_change, alarm = self._check_alarm(probs, map_run_length, timestamp)
+        if alarm is not None:
+            logger.info(f"Change point alarm at t={self.t} ({timestamp}), p={recent_change:.2f}")
+
+        return {
+            "t": self.t,
+            "timestamp": timestamp,
+            "value": x,
+            "run_lengths": self.run_lengths.copy(),
+            "run_length_probs": probs,
+            "map_run_length": map_run_length,
+            "recent_change_probability": recent_change,
+            "alarm": alarm,
+        }
+
+    def stream(self, values: Iterable[float], timestamps: Optional[Iterable] = None) -> Iterator[Dict[str, Any]]:
+        """Generator yielding the update for each incoming value"""
+        if timestamps is None:
+            for x in values:
+                yield self.update(x)
+        else:
+            for x, ts in zip(values, timestamps):
+                yield self.update(x, ts)
+
+    @log_execution
+    def warm_start(self, df: Optional[pd.DataFrame] = None, column: str = "log_return",
+                   date_col: str = "Date") -> "OnlineChangePointDetector":
+        """Consume history (brent_processed.csv by default) without emitting updates"""
+        if df is None:
+            df = pd.read_csv(BRENT_PROCESSED_PATH, parse_dates=[date_col])
+        df = df.sort_values(date_col)
+        if self.last_timestamp is not None:
+            df = df[df[date_col] > self.last_timestamp]
+
+        alarms = 0
+        for x, ts in zip(df[column].to_numpy(dtype=np.float64).tolist(), df[date_col]):
+            self._step(x, ts)
+            probs = np.exp(self.log_probs)
+            map_run_length = int(self.run_lengths[np.argmax(probs)])
+            alarms += self._check_alarm(probs, map_run_length, ts)[1] is not None
+        logger.info(f"Warm-started on {len(df)} observations ({alarms} alarms)")
+        return self
+
+    def checkpoint(self, path: Path):
+        """Save parameters and posterior state to an .npz file (suffix added if missing)"""
+        path = _checkpoint_path(path)
+        meta = {name: getattr(self, name) for name in self.PARAMS}
+        meta.update(
+            t=self.t,
+            in_alarm=self.in_alarm,
+            last_timestamp=None if self.last_timestamp is None else str(pd.Timestamp(self.last_timestamp)),
+        )
+        np.savez(
+            path,
+            meta=np.array(json.dumps(meta)),
+            run_lengths=self.run_lengths,
+            log_probs=self.log_probs,
+            mu=self.mu,
+            kappa=self.kappa,
+            alpha=self.alpha,
+            beta=self.beta,
+        )
+        logger.info(f"Checkpointed detector at t={self.t} to {path}")
+
+    @classmethod
+    def restore(cls, path: Path) -> "OnlineChangePointDetector":
+        """Rebuild a detector from a checkpoint written by checkpoint()"""
+        path = _checkpoint_path(path)
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            detector = cls(**{name: meta[name] for name in cls.PARAMS})
+            detector.run_lengths = data["run_lengths"]
+            detector.log_probs = data["log_probs"]
+            detector.mu = data["mu"]
+            detector.kappa = data["kappa"]
+            detector.alpha = data["alpha"]
+            detector.beta = data["beta"]
+
+        detector.t = meta["t"]
+        detector.in_alarm = meta["in_alarm"]
+        if meta["last_timestamp"] is not None:
+            detector.last_timestamp = pd.Timestamp(meta["last_timestamp"])
+        return detector
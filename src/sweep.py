@@ -0,0 +1,267 @@
+# src/sweep.py
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import SWEEP_CACHE_DIR, MODEL_CONFIG, EVENT_MATCH_WINDOW_DAYS
+from src.changepoint import ChangePointDetector
+from src.event_impact import calculate_event_impact, match_events_to_change_points
+from src.utils import log_execution
+
+logger = logging.getLogger(__name__)
+
+SHARED_COLUMNS = ("log_return",)
+
+# Worker-side views onto the parent's shared memory blocks
+_shared_arrays: Dict[str, np.ndarray] = {}
+_shared_handles = []
+
+
+def _attach_shared(specs: Dict[str, tuple]):
+    """Pool initializer: map the shared blocks as read-only arrays"""
+    for name, (shm_name, length) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _shared_handles.append(shm)
+        array = np.ndarray((length,), dtype=np.float64, buffer=shm.buf)
+        array.flags.writeable = False
+        _shared_arrays[name] = array
+
+
+def block_bootstrap(values: np.ndarray, breakpoints: Sequence[int], block_size: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """
+    Moving-block bootstrap within each segment, so the resample keeps the
+    regime structure while shuffling the dependence inside each regime.
+    """
+    out = np.empty_like(values)
+    start = 0
+    for end in breakpoints:
+        length = end - start
+        block = min(block_size, length)
+        n_blocks = -(-length // block)
+        starts = rng.integers(0, length - block + 1, n_blocks)
+        idx = (starts[:, None] + np.arange(block)).ravel()[:length]
+        out[start:end] = values[start + idx]
+        start = end
+    return out
+
+
+def _run_task(task: Dict[str, Any]) -> List[int]:
+    """Run one detection task against the shared arrays; returns change point indices"""
+    signal = _shared_arrays["log_return"]
+    start, end = task.get("start", 0), task.get("end") or len(signal)
+    signal = signal[start:end]
+
+    if task["group"] == "bootstrap":
+        rng = np.random.default_rng(task["seed"])
+        signal = block_bootstrap(signal, task["segments"], task["block_size"], rng)
+
+    detector = ChangePointDetector(model=task["model"], method=task["method"],
+                                   min_size=task["min_size"], jump=task.get("jump", 1))
+    breakpoints = detector.fit_predict(signal, n_changepoints=task.get("n_changepoints"),
+                                       penalty=task.get("penalty"))
+    return [int(b) + start for b in breakpoints[:-1]]
+
+
+def build_grid(n_obs: int, models: Sequence[str] = ("meanvar",),
+               n_changepoints: Sequence[int] = (3, 5, 8, 12, 17),
+               penalties: Sequence[float] = (), pelt_penalties: Sequence[float] = (),
+               subperiod_length: int = 3650, subperiod_step: int = 1825,
+               n_bootstrap: int = 100, block_size: int = 20, min_size: int = 30,
+               base_breakpoints: Optional[Sequence[int]] = None,
+               seed: int = MODEL_CONFIG["random_seed"]) -> List[Dict[str, Any]]:
+    """
+    Task configs for a sensitivity sweep:
+
+    - grid: every model x n_changepoints / penalty (binseg) and penalty (PELT)
+    - subperiod: rolling windows of subperiod_length days every subperiod_step,
+      plus one ending at n_obs
+    - bootstrap: within-segment block bootstraps around base_breakpoints
+    """
+    tasks = []
+    for model in models:
+        for k in n_changepoints:
+            tasks.append({"group": "grid", "method": "binseg", "model": model,
+                          "n_changepoints": int(k), "min_size": min_size})
+        for pen in penalties:
+            tasks.append({"group": "grid", "method": "binseg", "model": model,
+                          "penalty": float(pen), "min_size": min_size})
+        for pen in pelt_penalties:
+            tasks.append({"group": "grid", "method": "pelt", "model": model,
+                          "penalty": float(pen), "min_size": min_size})
+
+    base_model = models[0]
+    last_start = max(n_obs - subperiod_length, 0)
+    starts = list(range(0, last_start + 1, subperiod_step))
+    if starts[-1] != last_start:
+        # Final window ending at n_obs so the most recent rows are covered too
+        starts.append(last_start)
+    for start in starts:
+        tasks.append({"group": "subperiod", "method": "binseg", "model": base_model,
+                      "start": start, "end": min(start + subperiod_length, n_obs),
+                      "min_size": min_size})
+
+    if base_breakpoints is not None:
+        segments = [int(b) for b in base_breakpoints]
+        if not segments or segments[-1] != n_obs:
+            segments.append(n_obs)
+        for i in range(n_bootstrap):
+            tasks.append({"group": "bootstrap", "method": "binseg", "model": base_model,
+                          "n_changepoints": len(segments) - 1, "min_size": min_size,
+                          "segments": segments, "block_size": block_size, "seed": seed + i})
+    return tasks
+
+
+class SensitivitySweep:
+    """
+    Runs change point detection over a grid of configurations in a process
+    pool. The log-return array is placed in shared memory once instead of
+    pickling the DataFrame per task, and each (config, data hash) result is
+    cached as JSON so reruns only compute new tasks.
+    """
+
+    def __init__(self, price_df: pd.DataFrame, cache_dir: Path = SWEEP_CACHE_DIR,
+                 max_workers: Optional[int] = None):
+        self.price_df = price_df.sort_values("Date").reset_index(drop=True)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or os.cpu_count()
+
+        self.arrays = {col: self.price_df[col].to_numpy(dtype=np.float64) for col in SHARED_COLUMNS}
+        digest = hashlib.sha256()
+        for col in SHARED_COLUMNS:
+            digest.update(self.arrays[col].tobytes())
+        self.data_hash = digest.hexdigest()
+
+    def _task_key(self, task: Dict[str, Any]) -> str:
+        payload = json.dumps(task, sort_keys=True) + self.data_hash
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @log_execution
+    def run(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run tasks (skipping cached ones) and return one result per task"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        pending = []
+        for i, task in enumerate(tasks):
+            key = self._task_key(task)
+            path = self._cache_path(key)
+            if path.exists():
+                with open(path, "r") as f:
+                    results[i] = json.load(f)
+            else:
+                pending.append((i, key, task))
+
+        logger.info(f"{len(tasks) - len(pending)} of {len(tasks)} sweep tasks cached, running {len(pending)}")
+        if pending:
+            blocks = []
+            try:
+                specs = {}
+                for col, values in self.arrays.items():
+                    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                    np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+                    blocks.append(shm)
+                    specs[col] = (shm.name, len(values))
+
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach_shared,
+                                         initargs=(specs,)) as pool:
+                    chunksize = max(1, len(pending) // (self.max_workers * 4))
+                    outputs = pool.map(_run_task, [task for _, _, task in pending], chunksize=chunksize)
+                    for (i, key, task), change_points in zip(pending, outputs):
+                        result = {"key": key, "task": task, "change_points": change_points}
+                        with open(self._cache_path(key), "w") as f:
+                            json.dump(result, f)
+                        results[i] = result
+            finally:
+                for shm in blocks:
+                    shm.close()
+                    shm.unlink()
+        return results
+
+    def stability_table(self, results: List[Dict[str, Any]], reference: Sequence[int],
+                        tolerance_days: int = EVENT_MATCH_WINDOW_DAYS,
+                        events_df: Optional[pd.DataFrame] = None,
+                        event_tolerances: Sequence[int] = (7, 14, 30, 60)) -> pd.DataFrame:
+        """
+        For each reference change point, the fraction of runs in each group that
+        detected a change within tolerance_days (among runs whose data covers it),
+        plus how consistently the same event is matched across event_tolerances.
+        """
+        dates = self.price_df["Date"].to_numpy(dtype="datetime64[ns]")
+        reference = np.asarray(reference, dtype=np.int64)
+        ref_dates = dates[reference]
+        tolerance = np.timedelta64(tolerance_days, "D")
+
+        table = pd.DataFrame({"change_point_index": reference, "change_point_date": ref_dates})
+        for group in ("grid", "subperiod", "bootstrap"):
+            runs = [r for r in results if r["task"]["group"] == group]
+            if not runs:
+                continue
+            hits = np.zeros(len(reference))
+            covered = np.zeros(len(reference))
+            for run in runs:
+                start = run["task"].get("start", 0)
+                end = run["task"].get("end") or len(dates)
+                in_range = (ref_dates >= dates[start]) & (ref_dates < dates[end - 1])
+                found = dates[np.asarray(run["change_points"], dtype=np.int64)]
+                if len(found):
+                    nearest = np.abs(ref_dates[:, None] - found[None, :]).min(axis=1)
+                    hits += in_range & (nearest <= tolerance)
+                covered += in_range
+            with np.errstate(invalid="ignore", divide="ignore"):
+                table[f"{group}_frequency"] = hits / covered
+            table[f"{group}_runs"] = covered.astype(int)
+
+        if events_df is not None:
+            matches = pd.concat([
+                match_events_to_change_points(ref_dates, events_df, window_days=tol)["Event_name"]
+                for tol in event_tolerances
+            ], axis=1)
+            table["matched_event"] = matches.iloc[:, -1].to_numpy()
+            table["event_match_frequency"] = (
+                matches.eq(matches.iloc[:, -1], axis=0).sum(axis=1) / len(event_tolerances)
+            ).where(table["matched_event"].notna()).to_numpy()
+        return table
+
+
+def event_window_sensitivity(price_df: pd.DataFrame, events_df: pd.DataFrame,
+                             windows: Sequence[int] = (3, 5, 10, 20, 30, 60),
+                             min_impact: Optional[str] = None) -> pd.DataFrame:
+    """Per-event spread of the price impact across window sizes (one batched call)"""
+    impacts = calculate_event_impact(price_df, events_df, window_days=windows, min_impact=min_impact)
+    grouped = impacts.groupby(["event", "date"])["pct_change"]
+    return pd.DataFrame({
+        "pct_change_mean": grouped.mean(),
+        "pct_change_std": grouped.std(),
+        "sign_consistency": grouped.apply(lambda s: max((s > 0).mean(), (s < 0).mean())),
+        "n_windows": grouped.size(),
+    }).reset_index()
+
+
+@log_execution
+def run_sensitivity_sweep(price_df: pd.DataFrame, events_df: Optional[pd.DataFrame] = None,
+                          baseline_n_changepoints: int = MODEL_CONFIG["n_changepoints"],
+                          min_size: int = 30, max_workers: Optional[int] = None,
+                          **grid_kwargs) -> pd.DataFrame:
+    """
+    Baseline binseg run with baseline_n_changepoints, plus the full sweep
+    (grid_kwargs go to build_grid, e.g. n_changepoints=(3, 5, 8)),
+    aggregated into one stability table
+    """
+    sweep = SensitivitySweep(price_df, max_workers=max_workers)
+    baseline = ChangePointDetector(min_size=min_size).fit_predict(
+        sweep.arrays["log_return"], n_changepoints=baseline_n_changepoints)
+
+    tasks = build_grid(len(sweep.price_df), base_breakpoints=baseline, min_size=min_size, **grid_kwargs)
+    results = sweep.run(tasks)
+    return sweep.stability_table(results, baseline[:-1], events_df=events_df)
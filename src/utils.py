@@ -1,35 +1,231 @@
 # src/utils.py
+from collections import deque
 from datetime import datetime
 from functools import wraps
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import json
+import threading
 import time
+import tracemalloc
 import logging
+import numpy as np
 import pandas as pd
-from typing import Callable, Any
+from typing import Callable, Any, Iterable, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cap on kept profiler records (oldest are dropped)
+MAX_PROFILE_RECORDS = 10_000
+
+class StageProfiler:
+    """
+    Collects one record per @log_execution call made inside profile(): wall
+    and CPU time, input and output row counts and, when memory tracing is on,
+    the tracemalloc peak. Calls outside profile() are only logged, and at most
+    max_records records are kept. Records can be exported as JSON or CSV.
+
+    Profiling state is per thread, so a profile() block only records the calls
+    made by its own thread. tracemalloc itself is process-wide, so memory peaks
+    are only meaningful while one thread is tracing.
+    """
+
+    def __init__(self, max_records: int = MAX_PROFILE_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def active(self) -> bool:
+        """True inside a profile() block on the current thread"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    @property
+    def trace_memory(self) -> bool:
+        return getattr(self._local, 'trace_memory', False)
+
+    @property
+    def _frames(self) -> list:
+        if not hasattr(self._local, 'frames'):
+            self._local.frames = []
+        return self._local.frames
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+
+    def record(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+
+    @contextmanager
+    def profile(self, trace_memory: bool = True):
+        """Record @log_execution calls for the duration of the block, optionally tracing memory"""
+        local = self._local
+        previous = self.trace_memory
+        depth = getattr(local, 'depth', 0)
+        started = trace_memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        local.depth = depth + 1
+        local.trace_memory = trace_memory or previous
+        try:
+            yield self
+        finally:
+            local.depth = depth
+            local.trace_memory = previous
+            if started:
+                tracemalloc.stop()
+
+    def _enter(self):
+        if not (self.trace_memory and tracemalloc.is_tracing()):
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        # Propagate the enclosing stage's peak so far before resetting it
+        if self._frames:
+            self._frames[-1]['peak'] = max(self._frames[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        frame = {'start': current, 'peak': current}
+        self._frames.append(frame)
+        return frame
+
+    def _exit(self, frame) -> Optional[float]:
+        if frame is None:
+            return None
+        self._frames.pop()
+        peak = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+        if self._frames:
+            self._frames[-1]['peak'] = max(self._frames[-1]['peak'], peak)
+        return (peak - frame['start']) / 2 ** 20
+
+    def _snapshot(self) -> list:
+        with self._lock:
+            return list(self.records)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._snapshot())
+
+    def export_json(self, path: Path):
+        with open(path, 'w') as f:
+            json.dump(self._snapshot(), f, indent=2, default=str)
+
+    def export_csv(self, path: Path):
+        self.to_frame().to_csv(path, index=False)
+
+
+profiler = StageProfiler()
+
+def count_rows(obj) -> Optional[int]:
+    """Row count of a DataFrame/Series/array, or the sum over a tuple/list of them"""
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(obj)
+    if isinstance(obj, (tuple, list)) and obj and all(
+            isinstance(o, (pd.DataFrame, pd.Series, np.ndarray)) for o in obj):
+        return sum(len(o) for o in obj)
+    return None
+
 def log_execution(func: Callable) -> Callable:
-    """Decorator to log function execution time"""
+    """Decorator to log function execution time and, inside profiler.profile(), record it"""
     @wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        start_time = time.time()
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
+        recording = profiler.active
+        if recording:
+            started_at = datetime.now().isoformat(timespec='seconds')
+            frame = profiler._enter()
+            rows_in = next((n for n in map(count_rows, list(args) + list(kwargs.values())) if n is not None), None)
         logger.info(f"Executing {func.__name__}...")
+        status, result = 'ok', None
         try:
             result = func(*args, **kwargs)
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.info(f"Completed {func.__name__} in {elapsed:.2f}s")
             return result
         except Exception as e:
+            status = 'error'
             logger.error(f"Error in {func.__name__}: {str(e)}")
             raise
+        finally:
+            if recording:
+                profiler.record({
+                    'stage': func.__qualname__,
+                    'started_at': started_at,
+                    'wall_s': time.perf_counter() - start_time,
+                    'cpu_s': time.process_time() - start_cpu,
+                    'peak_mem_mb': profiler._exit(frame),
+                    'rows_in': rows_in,
+                    'rows_out': count_rows(result),
+                    'status': status,
+                })
     return wrapper
 
+def fingerprint_inputs(paths: Iterable[Path], **params) -> str:
+    """Content hash of the given files plus any keyword parameters"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(Path(path).name).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    for key in sorted(params):
+        digest.update(f"{key}={params[key]!r}".encode())
+    return digest.hexdigest()
+
+def parse_dates(values: pd.Series, formats: Iterable[str], dayfirst: Optional[bool] = None) -> pd.Series:
+    """
+    Parse a string column with each explicit format in turn, vectorized over
+    the rows still unparsed; only rows matching none of them fall back to
+    per-element inference. Each distinct string is parsed once, which matters
+    for panels where every date repeats per instrument. Unparseable rows come
+    back as NaT.
+
+    When formats include a numeric slash format (e.g. %m/%d/%Y), it fixes the
+    day/month order: slash dates it rejects (such as "13/02/2020" for %m/%d/%Y)
+    are left as NaT rather than guessed the other way round. dayfirst for the
+    fallback defaults to that same order (day first if there is none).
+    """
+    formats = list(formats)
+    slash_formats = [f for f in formats if f.startswith(('%m/', '%d/'))]
+    if dayfirst is None:
+        dayfirst = not slash_formats or slash_formats[0].startswith('%d/')
+
+    codes, uniques = pd.factorize(values)
+    strings = pd.Series(uniques).astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=strings.index, dtype='datetime64[ns]')
+    remaining = pd.Series(True, index=strings.index)
+
+    for fmt in formats:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(strings[remaining], format=fmt, errors='coerce')
+        hit = attempt.notna()
+        parsed[attempt.index[hit]] = attempt[hit]
+        remaining[attempt.index[hit]] = False
+
+    if slash_formats and remaining.any():
+        ambiguous = remaining & strings.str.match(r'^\d{1,2}/\d{1,2}/\d{2,4}$')
+        if ambiguous.any():
+            logger.warning(f"{ambiguous.sum()} distinct slash dates don't match {slash_formats} "
+                           f"(e.g. {strings[ambiguous].iloc[0]!r}), leaving them unparsed")
+            remaining &= ~ambiguous
+
+    if remaining.any():
+        logger.warning(f"{remaining.sum()} distinct dates matched no explicit format, falling back to inference")
+        parsed[remaining] = pd.to_datetime(strings[remaining], format='mixed', dayfirst=dayfirst, errors='coerce')
+
+    result = parsed.to_numpy()[codes]
+    result[codes < 0] = np.datetime64('NaT')
+    return pd.Series(result, index=values.index, name=values.name)
+
 def validate_date_range(df: pd.DataFrame, date_col: str, 
-                       start_date: datetime, end_date: datetime) -> pd.DataFrame:
+                       start_date: datetime, end_date: Optional[datetime]) -> pd.DataFrame:
     """
     Ensure DataFrame dates are within expected range
-    and convert to timezone-naive if needed
+    and convert to timezone-naive if needed.
+    An end_date of None leaves the range open-ended.
     """
     try:
         # Ensure datetime and remove timezone if present
@@ -39,10 +235,12 @@ def validate_date_range(df: pd.DataFrame, date_col: str,
             df[date_col] = pd.to_datetime(df[date_col])
         
         # Validate range
-        mask = (df[date_col] >= start_date) & (df[date_col] <= end_date)
+        mask = df[date_col] >= start_date
+        if end_date is not None:
+            mask &= df[date_col] <= end_date
         if not mask.all():
             filtered_count = len(df) - mask.sum()
-            logger.warning(f"Filtering {filtered_count} rows outside date range {start_date} to {end_date}")
+            logger.warning(f"Filtering {filtered_count} rows outside date range {start_date} to {end_date or 'latest'}")
         
         return df[mask].copy()
         